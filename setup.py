@@ -40,9 +40,7 @@ setup(
         'molmass',
         'openpyxl>=3.0.0',
         'googletrans==3.1.0a0',
-        'fuzzywuzzy',
-        'levenshtein>=0.20.9',
-        'python-Levenshtein>=0.20.9',
+        'rapidfuzz',
         'requests'
         ],
     include_package_data=True,
@@ -0,0 +1,36 @@
+import pytest
+
+from wadi.utils import StringList
+
+def _replace(r_dict, s):
+    sl = StringList([s])
+    sl.replace_strings(r_dict)
+    return sl[0]
+
+def test_replace_strings_sequential():
+    """ Test whether the replacements are performed one after the other,
+    in the order of the dictionary items """
+    assert _replace({"mg/l": "mg/L", "/": " per "}, "mg/l") == "mg per L"
+    assert _replace({"a": "b", "b": "c"}, "ab") == "cc"
+    assert _replace({"b": "c", "a": "b"}, "ab") == "bc"
+
+def test_normalize_removes_sequentially():
+    """ Test whether removing a string can create a match for a string
+    that is removed later """
+    sl = StringList(["kouicpde damp", "Temp °C"])
+    sl.normalize({"°C": "degC"}, ["icp", "koude damp"])
+    assert sl == ["", "Temp degC"]
+
+def test_replace_strings_type_error():
+    """ Test whether non-str search or replace strings are rejected """
+    with pytest.raises(TypeError):
+        _replace({"a": 1}, "ab")
+    with pytest.raises(TypeError):
+        _replace("a", "ab")
+
+def test_strip_parentheses():
+    """ Test whether nested parentheses are removed entirely and whether
+    the text between two pairs of parentheses is preserved """
+    sl = StringList(["x (y (z)) w", "a (b) c (d)"])
+    sl.strip_parentheses()
+    assert sl == ["x  w", "a  c "]
@@ -1,5 +1,10 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import re
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 import time
 
 import googletrans as gt
@@ -19,6 +24,9 @@ is needed.
 # Define some global constants for the PubChem methods
 RE_CAS = r"^(CAS-)?(\d+)-(\d+)-(\d+)$"  # Regular expression for CAS number in PubChem list of synonyms
 REQ_PER_SEC = 5  # PUBCHEM API does not accept >5 requests per second
+PUBCHEM_MAX_ATTEMPTS = 3  # Maximum number of attempts for a request to the PubChem API
+PUBCHEM_RETRY_STATUS = (429, 500, 502, 503, 504)  # HTTP status codes for which a request is retried
+PUBCHEM_CACHE_SIZE = 4096  # Maximum number of PubChem responses that are stored
 # List of property names available in PubChem when querying compound properties. See
 # https://pubchem.ncbi.nlm.nih.gov/docs/pug-rest#section=Compound-Property-Tables 
 PUBCHEM_COMPOUND_PROPS = [  
@@ -65,6 +73,26 @@ PUBCHEM_COMPOUND_PROPS = [
         "Fingerprint2D",
     ]
 
+# Session used for all requests to the PubChem REST API, so that the
+# connection to the server is kept alive and reused between requests.
+_PUBCHEM_SESSION = requests.Session()
+_PUBCHEM_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+# Ordered dictionary to store the json dicts returned by the PubChem
+# API for each URL, so that the same query is sent only once. At most
+# PUBCHEM_CACHE_SIZE responses are stored, the least recently used
+# response is removed first. The lock protects the dictionary when
+# get_pubchem_json is called from different threads.
+_PUBCHEM_CACHE = OrderedDict()
+_PUBCHEM_CACHE_LOCK = threading.Lock()
+# Lock and time of the last request, used to keep the number of
+# requests below REQ_PER_SEC (also when called from different threads).
+_PUBCHEM_LOCK = threading.Lock()
+_pubchem_last_request = 0.0
+
+# Define some global constants for the Google Translate methods
+TRANSLATE_MAX_BACKOFF = 8  # Maximum number of seconds to wait before retrying a failed request
+TRANSLATE_MAX_TOTAL_WAIT = 30  # Maximum total number of seconds to wait for retries
+
 
 def translate_strings(
     strings,
@@ -85,8 +113,14 @@ def translate_strings(
         String that specifies the language to translate to.
         Default: "EN".
     max_attempts : int
-        The maximum number of attempts to connect to the Google
-        Translate API. Default: 10.
+        The maximum number of failed attempts to connect to the Google
+        Translate API (in total, for all strings). Default: 10.
+
+    Returns
+    -------
+    result : list or None
+        List with the translated strings, or None if the strings
+        could not be translated within max_attempts attempts.
     """
 
     strings = list(strings)
@@ -95,18 +129,40 @@ def translate_strings(
         raise ValueError("Invalid language(s) specified")
 
     t = gt.Translator()
-    for i in range(max_attempts):
-        try:
-            rv = []
-            for s in strings:
+    rv = []
+    # The number of failed attempts and the total time waited.
+    i = 0
+    waited = 0
+    # Translate the strings one by one (googletrans sends a separate
+    # request for each string anyway, also when a list is passed).
+    # When an attempt fails only the failed string is sent again, the
+    # strings that were translated before are kept.
+    for s in strings:
+        while True:
+            try:
                 rv.append(t.translate(s, src=src_lang, dest=dst_lang).text)
-            return rv
-        except:
-            print(
-                f"Failed attempt ({i}) to connect to Google Translate API. Retrying..."
-            )
-
-    return None
+                break
+            # googletrans does not define its own exception types, a
+            # failed request can raise anything from an HTTP error to
+            # an AttributeError when the response can not be parsed.
+            except Exception:
+                print(
+                    f"Failed attempt ({i}) to connect to Google Translate API. Retrying..."
+                )
+                i += 1
+                # Give up after max_attempts failed attempts.
+                if i >= max_attempts:
+                    return None
+                # Wait before retrying, doubling the waiting time after
+                # each failed attempt. The waiting time is limited to
+                # TRANSLATE_MAX_BACKOFF seconds per attempt and to
+                # TRANSLATE_MAX_TOTAL_WAIT seconds in total.
+                wait = min(2 ** (i - 1), TRANSLATE_MAX_BACKOFF, TRANSLATE_MAX_TOTAL_WAIT - waited)
+                if wait > 0:
+                    time.sleep(wait)
+                    waited += wait
+
+    return rv
 
 
 def get_pubchem_json(url):
@@ -125,10 +181,31 @@ def get_pubchem_json(url):
         Returns the json dictonary returned by the PubChem API, or
         None if an error occurred.
     """
+    # Return (a copy of) the json dict from the cache if the same URL
+    # was queried before. A copy is returned so that callers can not
+    # modify the stored dict.
+    with _PUBCHEM_CACHE_LOCK:
+        if url in _PUBCHEM_CACHE:
+            _PUBCHEM_CACHE.move_to_end(url)
+            return copy.deepcopy(_PUBCHEM_CACHE[url])
+
     try:
-        # Send the request and try to get the json dictionary
-        # from the response
-        response = requests.get(url, timeout=(2, 5))
+        for i in range(PUBCHEM_MAX_ATTEMPTS):
+            # Pause to avoid exceeding the permitted number of requests
+            # per second (also when a request is retried).
+            _wait_for_pubchem()
+            # Send the request
+            response = _PUBCHEM_SESSION.get(url, timeout=(2, 5))
+            # Retry if the server is busy or if the number of requests
+            # was exceeded after all, but not after the final attempt.
+            if (response.status_code not in PUBCHEM_RETRY_STATUS) or (
+                i == PUBCHEM_MAX_ATTEMPTS - 1
+            ):
+                break
+            # Wait before retrying, doubling the waiting time after
+            # each failed attempt.
+            time.sleep(0.5 * 2**i)
+        # Try to get the json dictionary from the response
         rv = response.json()
         # Any fault on the PubChem side will result in a
         # key 'Fault'. If this key exists, return None.
@@ -143,13 +220,64 @@ def get_pubchem_json(url):
         print("An error occured during contacting of the PubChem Power User Gateway.")
         return None
     else:
-        # Pause to avoid exceeding the permitted number of requests
-        # per second.
-        time.sleep(1 / REQ_PER_SEC)
+        # Store the json dictionary (only successful requests are
+        # stored, so that failed requests can be retried later) and
+        # remove the least recently used one if the cache is full.
+        with _PUBCHEM_CACHE_LOCK:
+            _PUBCHEM_CACHE[url] = copy.deepcopy(rv)
+            if len(_PUBCHEM_CACHE) > PUBCHEM_CACHE_SIZE:
+                _PUBCHEM_CACHE.popitem(last=False)
         # Return the json dictionary.
         return rv
 
 
+def _wait_for_pubchem():
+    """
+    This method pauses until at least 1 / REQ_PER_SEC seconds have
+    passed since the previous request to the PubChem API, so that the
+    permitted number of requests per second is not exceeded.
+    """
+    global _pubchem_last_request
+    with _PUBCHEM_LOCK:
+        wait = _pubchem_last_request + 1 / REQ_PER_SEC - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _pubchem_last_request = time.monotonic()
+
+
+def query_pubchem_batch(func, strings, max_workers=REQ_PER_SEC):
+    """
+    This method calls one of the PubChem query functions in this
+    module for multiple strings. Duplicate strings are looked up only
+    once and the requests are sent concurrently from a thread pool,
+    so that the waiting time for the responses overlaps. The number
+    of requests per second remains limited to REQ_PER_SEC.
+
+    Parameters
+    ----------
+    func : function
+        The function to call for each string (for example,
+        query_pubchem_cas or query_pubchem_synonyms).
+    strings : list or list-like
+        The strings to look up.
+    max_workers : int, optional
+        The maximum number of threads used to send the requests.
+        Default: REQ_PER_SEC.
+
+    Returns
+    -------
+    result : dict
+        Dictionary with the (unique) elements of 'strings' as keys
+        and the values returned by 'func' as values.
+    """
+    # Remove any duplicates while preserving the order.
+    unique = list(dict.fromkeys(strings))
+    if len(unique) < 2:
+        return {s: func(s) for s in unique}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(unique, executor.map(func, unique)))
+
+
 def query_pubchem_fuzzy(s):
     """
     This method uses the PubChem REST auto-complete API service
@@ -1,4 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
 import copy
+import os
 import pandas as pd
 
 from wadi.base import WadiBaseClass
@@ -96,7 +98,12 @@ class FileReader(WadiBaseClass):
         **kwargs: dict, optional
             Dictionary with kwargs for the 'pd_reader' function. The
             kwargs can be a mix of WaDI specific keywords and valid
-            keyword arguments for the 'pd_reader' function.
+            keyword arguments for the 'pd_reader' function. The
+            default engine of the 'pd_reader' function is used unless
+            an 'engine' is specified explicitly (for example
+            engine='pyarrow' for read_csv, note that Pandas considers
+            this engine experimental and that it does not support all
+            keyword arguments).
         """
 
         self._file_path = file_path
@@ -117,7 +124,14 @@ class FileReader(WadiBaseClass):
         self._lod_column = lod_column
         self._extract_units_from_feature_name = extract_units_from_feature_name
 
-        self._kwargs = copy.deepcopy(vars()["kwargs"])  # deepcopy just to be sure
+        # Store a copy of the kwargs. A shallow copy suffices because
+        # only the top-level keys and the keys of the dicts in 'blocks'
+        # are modified, so only these dicts are copied as well (the
+        # values may be large objects that need not be copied).
+        self._kwargs = dict(kwargs)
+        blocks = self._kwargs.get("blocks")
+        if isinstance(blocks, (list, tuple)):
+            self._kwargs["blocks"] = [copy.copy(b) for b in blocks]
 
     def _execute(self):
         """
@@ -165,7 +179,14 @@ class FileReader(WadiBaseClass):
             # Use the values in the column with name 'mask' to
             # hide the values labelled as False from view.
             if self._mask is not None:
-                df = df.loc[df[self._mask]]
+                # Index with the underlying NumPy array if the column
+                # is boolean, which avoids aligning the mask with the
+                # index of df. Otherwise use the column itself, so that
+                # Pandas raises an error if it contains missing values.
+                mask = df[self._mask]
+                if mask.dtype == bool:
+                    mask = mask.to_numpy()
+                df = df.loc[mask]
 
             if self._lod_column is not None:
                 df[self._c_dict["Values"]] = df[self._lod_column] + df[self._c_dict["Values"]].astype(str)
@@ -250,12 +271,10 @@ class FileReader(WadiBaseClass):
                 f"WaDI has not been designed to work with reader {pd_reader}. Proceed with caution."
             )
 
-        # Start with an empty DataFrame...
-        df = pd.DataFrame()
-        # ... and empty lists for units and datatype.
-        units = []
-        datatypes = []
-        # Loop over the sets of kwargs in the block(s).
+        # Loop over the sets of kwargs in the block(s) to check them
+        # and to write the Pandas calls to the log file before any of
+        # the blocks is read.
+        block_args = []
         for pd_kwargs in blocks:
             # Set values for unit_row and datatype, these may be
             # overridden if the user specified a kwarg for any
@@ -279,26 +298,94 @@ class FileReader(WadiBaseClass):
             kws = ", ".join(f"{k}={v}" for k, v in pd_kwargs.items())
             self._log(f" - pandas.{pd_reader_name}('{file_path}', {kws})")
 
-            # Call the requested Pandas reader function to import the data.
-            df_r = pd_reader(file_path, **valid_kwargs(pd_reader, **pd_kwargs))
+            block_args.append((pd_kwargs, units_row, datatype))
 
-            # Use the pd.concat function to join the return values from the
-            # pandas reader function (i.e. the DataFrames read from the file).
-            df = pd.concat([df, df_r], axis=1)
+        # Read the blocks. Each block is read by a separate call to the
+        # Pandas reader function, so multiple blocks can be read
+        # concurrently. The results are returned in the same order as
+        # the blocks.
+        read_block = lambda args: self._read_block(
+            file_path, pd_reader, *args
+        )
+        if len(block_args) > 1:
+            max_workers = min(len(block_args), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(read_block, block_args))
+        else:
+            results = [read_block(args) for args in block_args]
 
-            # Read the units if the user specified a valid row number, else...
-            if units_row > -1:
-                units += self._read_single_row_as_list(
-                    file_path, pd_reader, pd_kwargs, units_row
-                )
-            # ... create a list of empty strings with the same length as the
-            # number of columns read
-            else:
-                units += [""] * df_r.shape[1]
+        # Start with an empty list for the DataFrames read...
+        frames = []
+        # ... and empty lists for units and datatype.
+        units = []
+        datatypes = []
+        for df_r, units_r, datatypes_r in results:
+            frames.append(df_r)
+            units += units_r
+            datatypes += datatypes_r
+
+        # Use the pd.concat function to join the DataFrames read from
+        # the file. Calling it once after the loop avoids copying the
+        # joined DataFrame each time a block is added.
+        if frames:
+            df = pd.concat(frames, axis=1, copy=False)
+        else:
+            df = pd.DataFrame()
+
+        return df, units, datatypes
+
+    def _read_block(
+        self,
+        file_path,
+        pd_reader,
+        pd_kwargs,
+        units_row,
+        datatype,
+    ):
+        """
+        This method calls the specified Pandas reader function to
+        import a single block of data from file_path, as well as
+        the measurement units of the columns in the block.
+
+        Parameters
+        ----------
+        file_path : str
+            The file to be read.
+        pd_reader : callable
+            The Pandas function to read the file.
+        pd_kwargs : dict
+            Keyword arguments for the pd_reader function.
+        units_row : int
+            The (zero-based) number of the row with the units, or -1
+            if the block does not contain a row with units.
+        datatype : str
+            The datatype of the columns in the block.
+
+        Returns
+        ----------
+        df : DataFrame
+            Pandas DataFrame with the imported data
+        units : list
+            List with the units for each column read.
+        datatypes: list
+            List with the datatypes for each column read.
+        """
+        # Call the requested Pandas reader function to import the data.
+        df = pd_reader(file_path, **valid_kwargs(pd_reader, **pd_kwargs))
+
+        # Read the units if the user specified a valid row number, else...
+        if units_row > -1:
+            units = self._read_single_row_as_list(
+                file_path, pd_reader, pd_kwargs, units_row
+            )
+        # ... create a list of empty strings with the same length as the
+        # number of columns read
+        else:
+            units = [""] * df.shape[1]
 
-            # Make sure that the datatype for this block is copied as many
-            # times as there are columns in the DataFrame that was read
-            datatypes += [datatype] * df_r.shape[1]
+        # Make sure that the datatype for this block is copied as many
+        # times as there are columns in the DataFrame that was read
+        datatypes = [datatype] * df.shape[1]
 
         return df, units, datatypes
 
@@ -338,10 +425,15 @@ class FileReader(WadiBaseClass):
         if "usecols" in pd_kwargs:
             sr_kwargs["usecols"] = pd_kwargs["usecols"]
         sr_kwargs["header"] = None
-        # Note that header=None does not seem to work in conjuction
-        # with skiprows! Therefore, read the data up until row 
-        # row_number + 1, the units will be in the last row of the
-        # dataframe returned by the reader.
+        # Note that skiprows can not be used to read only the row
+        # with the units (with nrows=1). The skiprows kwarg counts
+        # the rows in the file, whereas nrows counts the rows that
+        # are parsed, which excludes blank rows. This would change
+        # the row that is read if any blank rows precede the units.
+        # Therefore, read the data up until row row_number + 1, the
+        # units will be in the last row of the dataframe returned by
+        # the reader. Because nrows limits the number of rows that
+        # are parsed, the rest of the file is not read.
         sr_kwargs["nrows"] = row_number + 1
 
         # Read the data, replace any NaNs with empty strings and 
@@ -1,4 +1,5 @@
 from collections import UserDict
+import functools
 import pandas as pd
 import re
 
@@ -14,6 +15,32 @@ DICT_KEYS = ['name',
              'u_str',
             ]
 
+# Regular expression for the dot followed by a number that Pandas adds
+# to duplicate column names
+_DUPLICATE_SUFFIX_RE = re.compile(r'\.[0-9]+$')
+
+@functools.lru_cache(maxsize=4096)
+def _strip_duplicate_suffix(s):
+    """
+    This function removes the dot followed by a number that Pandas adds
+    to duplicate column names. The results are cached because the same
+    column names typically occur in many files.
+
+    Parameters
+    ----------
+    s : str
+        The column name.
+
+    Returns
+    -------
+    result : str
+        The column name without the suffix.
+    """
+    duplicate_nr = _DUPLICATE_SUFFIX_RE.search(s)
+    if duplicate_nr:
+        return s[:-len(duplicate_nr.group())]
+    return s
+
 class InfoTable(UserDict):
     """
     Nested dictionary that stores information about the imported data.
@@ -113,10 +140,7 @@ class InfoTable(UserDict):
             for i, key_0 in enumerate(df.columns):
                 # Pandas adds a dot followed by a number for duplicate columns
                 # so to get the real feature name, it must be removed
-                feature_name = key_0
-                duplicate_nr = re.search('\.\d+$', feature_name)
-                if duplicate_nr:
-                    feature_name = feature_name[:-len(duplicate_nr.group())]
+                feature_name = _strip_duplicate_suffix(key_0)
                 units_str = units[i]
                 if extract_units_from_feature_name == True:
                     feature_name, units_str = parse_name_and_units(feature_name)
@@ -1,17 +1,16 @@
-from collections import UserDict
 import json
 import numpy as np
+import openpyxl
 import pandas as pd
 from pathlib import Path
-import re
 
-import fuzzywuzzy.fuzz as fwf
-import fuzzywuzzy.process as fwp
+from rapidfuzz import fuzz as fwf, process as fwp
 
 from wadi.base import WadiBaseClass
 from wadi.utils import StringList, check_arg_list, fuzzy_min_score
 from wadi.api_utils import (
     translate_strings,
+    query_pubchem_batch,
     query_pubchem_fuzzy,
     query_pubchem_cas,
     query_pubchem_synonyms,
@@ -62,14 +61,26 @@ DEFAULT_STR2REMOVE = [
     "bij",  # whitespace, string, whitespace
 ]
 
+# Valid match methods, in order of increasing computational cost
 VALID_MATCH_METHODS = ["exact", "ascii", "regex", "fuzzy", "pubchem"]
 
+# Minimum number of entries in a mapping dictionary for which exact
+# matches are looked up with a pandas Index instead of a Python loop.
+# For smaller dictionaries the overhead of creating the Index exceeds
+# the time saved by the lookup.
+EXACT_MATCH_INDEX_MIN_SIZE = 1000
 
-class MapperDict(UserDict):
+# Maximum number of strings for which the fuzzy scores are computed
+# in a single call to RapidFuzz's cdist function. Limits the size of
+# the score matrix for large mapping dictionaries.
+FUZZY_CDIST_CHUNK_SIZE = 100
+
+
+class MapperDict(dict):
     """
     Instances of this class are meant to be used as dictionaries
     that translate names and units into their aliases. It derives
-    from the UserDict wrapper to extend the functionality of a
+    from Python's built-in dict to extend the functionality of a
     regular Python dict with some class methods to create an
     instance from json files or PubChem queries. The dictionary
     can also be saved to a json file and it contains a translate
@@ -91,7 +102,7 @@ class MapperDict(UserDict):
         Returns
         ----------
         result : class instance
-            An instance of the UserDict class containing the
+            An instance of the MapperDict class containing the
             imported data.
         """
         with open(file_path, "r") as fp:
@@ -117,7 +128,7 @@ class MapperDict(UserDict):
         Returns
         ----------
         result : class instance
-            An instance of the UserDict class containing the
+            An instance of the MapperDict class containing the
             imported data.
         """
         # The json file resides in the parent directory of the
@@ -148,7 +159,7 @@ class MapperDict(UserDict):
         Returns
         ----------
         result : class instance
-            An instance of the UserDict class containing the
+            An instance of the MapperDict class containing the
             imported data.
         """
 
@@ -185,7 +196,7 @@ class MapperDict(UserDict):
         Returns
         ----------
         result : class instance
-            An instance of the UserDict class in which the elements
+            An instance of the MapperDict class in which the elements
             of 'strings' are the keys and the CAS numbers the values.
             An empty dictionary is returned if translation of the
             strings failed for some reason.
@@ -201,9 +212,9 @@ class MapperDict(UserDict):
         # Start with an empty dict
         rv_dict = {}
         if translated_keys is not None:
-            rv_dict = {
-                s: query_pubchem_cas(s_en) for s, s_en in zip(strings, translated_keys)
-            }
+            # Look up the CAS numbers of all strings at once.
+            res = query_pubchem_batch(query_pubchem_cas, translated_keys)
+            rv_dict = {s: res[s_en] for s, s_en in zip(strings, translated_keys)}
 
         return cls(rv_dict)
 
@@ -232,7 +243,7 @@ class MapperDict(UserDict):
         Returns
         ----------
         result : class instance
-            An instance of the UserDict class in which the elements
+            An instance of the MapperDict class in which the elements
             of 'strings' are the keys and the CID numbers the values.
             An empty dictionary is returned if translation of the
             strings failed for some reason.
@@ -248,11 +259,12 @@ class MapperDict(UserDict):
         # Start with an empty dict
         rv_dict = {}
         if translated_keys is not None:
+            # Look up the PubChem synonyms of all strings at once.
+            synonyms = query_pubchem_batch(query_pubchem_synonyms, translated_keys)
             for s, s_en in zip(strings, translated_keys):
                 # Add each element s to the dict
                 rv_dict[s] = None
-                # Look up the PubChem synonyms
-                res = query_pubchem_synonyms(s_en)
+                res = synonyms[s_en]
                 # If a result was returned
                 if res is not None:
                     # Look up the key 'CID' in the first element
@@ -311,7 +323,7 @@ class MapperDict(UserDict):
             The json file to be written.
         """
         with open(file_path, "w") as fp:
-            json.dump(self.data, fp, indent=2)
+            json.dump(self, fp, indent=2)
 
     def translate_keys(
         self,
@@ -337,13 +349,14 @@ class MapperDict(UserDict):
         """
 
         translated_keys = translate_strings(
-            self.data.keys(), src_lang, dst_lang, max_attempts
+            self.keys(), src_lang, dst_lang, max_attempts
         )
         if translated_keys is not None:
             translated_dict = {
-                k: v for k, v in zip(translated_keys, self.data.values())
+                k: v for k, v in zip(translated_keys, self.values())
             }
-            self.data = translated_dict
+            self.clear()
+            self.update(translated_dict)
 
     def __str__(self):
         """
@@ -357,13 +370,13 @@ class MapperDict(UserDict):
             the mapping dictionary.
         """
         max_lines = 10
-        rv = f"This dictionary contains {len(self.data)} elements.\n"
-        if len(self.data) > max_lines:
+        rv = f"This dictionary contains {len(self)} elements.\n"
+        if len(self) > max_lines:
             rv += f"Only the first {max_lines} elements are shown.\n"
         rv += (
             f"This mapping dictionary contains the following names and their aliases:\n"
         )
-        for i, (key, value) in enumerate(self.data.items()):
+        for i, (key, value) in enumerate(self.items()):
             rv += f" - {key} --> {value}\n"
             if i > max_lines:
                 break
@@ -419,6 +432,11 @@ class Mapper(WadiBaseClass):
         self._replace_strings = DEFAULT_STR2REPLACE
         self._remove_strings = DEFAULT_STR2REMOVE
 
+        # Define the attribute that stores the tidied keys of the
+        # mapping dictionary so that they can be reused when the
+        # mapper is executed more than once.
+        self._keys_t = None
+
     def __call__(
         self,
         m_dict=None,
@@ -439,8 +457,10 @@ class Mapper(WadiBaseClass):
         match_method : str or list
             One or more names of the match method(s) to be used to find
             feature and unit names. Valid values include 'exact', 'ascii',
-            'regex', 'fuzzy', 'pubchem'. Default is 'exact' for name
-            mapping or 'regex' for unit mapping.
+            'regex', 'fuzzy', 'pubchem'. The methods are applied in
+            that order, regardless of the order in which they are
+            specified. Default is 'exact' for name mapping or 'regex'
+            for unit mapping.
         regex_map : UnitRegexMapper
             UnitRegexMapper object to be used for mapping when match_method
             = 'regex'.
@@ -459,6 +479,11 @@ class Mapper(WadiBaseClass):
         elif self._key_1 == "unit":
             self.match_method = match_method or ["regex"]
         self.match_method = check_arg_list(self.match_method, VALID_MATCH_METHODS)
+        # Sort the match methods in the order of VALID_MATCH_METHODS,
+        # which lists them from cheapest to most expensive. Strings
+        # matched by a cheap method are not passed to the expensive
+        # ones.
+        self.match_method = sorted(self.match_method, key=VALID_MATCH_METHODS.index)
 
         if isinstance(m_dict, dict):
             self._m_dict = MapperDict(m_dict)
@@ -474,71 +499,64 @@ class Mapper(WadiBaseClass):
         self._remove_strings = remove_strings or DEFAULT_STR2REMOVE
         # self._strip_parentheses = strip_parentheses
 
+        # Discard any tidied keys of a previous mapping dictionary.
+        self._keys_t = None
+
     def _df2excel(self, df):
         """
-        This method creates an ExcelWriter instance that will either
-        append a worksheet to an existing Excel file (for example
-        when units are mapped after names) or creates a new Excel
-        file when it does not yet exist (when mapping is performed
-        for the first time). Any sheets in an already-existing file
-        will get overwritten through the use of if_sheet_exists='replace'.
+        This method writes a DataFrame to a worksheet of an Excel file
+        with openpyxl. The worksheet will either be added to an existing
+        Excel file (for example when units are mapped after names) or
+        to a new Excel file when it does not yet exist (when mapping is
+        performed for the first time). Any existing worksheet with the
+        same name will be replaced.
 
         Parameters
         ----------
         df : DataFrame
             The DataFrame to be saved to the Excel file.
 
-        Raises
-        ------
-
-        FileNotFoundError
-            When the file exists but has a size of zero bytes. This
-            error is caught internally and the 'mode' attribute is
-            changed from 'a' to 'w' to overwrite the existing file.
+        Notes
+        ----------
+        The rows are appended to the worksheet directly, which is much
+        faster than DataFrame.to_excel because no styled cell objects
+        are created. A new file is written in openpyxl's write-only
+        mode, which streams the rows to disk. A workbook that already
+        exists must be loaded in full to be able to add a worksheet.
         """
         # Define the Excel file name based on the name of the log file.
         xl_fpath = Path(
             self._output_dir,
             f"mapping_results_{self._log_fname.stem}.xlsx",
         )
+        sheet_name = f"{self._key_1.capitalize()}s"
+
+        # Check if any existing file with the same name has a size
+        # greater than zero bytes. A file may have been created but
+        # not properly written if an error occured.
+        if xl_fpath.is_file() and (xl_fpath.stat().st_size > 0):
+            # Load the existing workbook and remove the worksheet
+            # if it already exists, the new worksheet is inserted at
+            # the same position.
+            wb = openpyxl.load_workbook(xl_fpath)
+            index = None
+            if sheet_name in wb.sheetnames:
+                index = wb.sheetnames.index(sheet_name)
+                del wb[sheet_name]
+            ws = wb.create_sheet(sheet_name, index)
+        else:
+            # Create a new workbook in write-only mode.
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet(sheet_name)
 
-        try:
-            # Check if any existing file with the same name has a
-            # size greater than zero bytes. A file may have been
-            # created but not properly written if an error occured.
-            # If that was the case, an error will occur.
-            if xl_fpath.stat().st_size > 0:
-                # If the file size is greater than zero, initialize
-                # the ExcelWriter object with mode="a" to append the
-                # worksheet.
-                xl_writer = pd.ExcelWriter(
-                    xl_fpath,
-                    mode="a",
-                    engine="openpyxl",
-                    if_sheet_exists="replace",
-                )
-            else:
-                # If the file size is zero, raise the same error that
-                # would be raised if the file did not exists.
-                raise FileNotFoundError
-        except FileNotFoundError:
-            # If the file does not exist, initialize the ExcelWriter
-            # object with mode="w" so that the worksheet is added to
-            # an empty file.
-            xl_writer = pd.ExcelWriter(
-                xl_fpath,
-                engine="openpyxl",
-                mode="w",
-            )
-
-        # Add the DataFrame to write it to the Excel file.
-        df.to_excel(
-            xl_writer,
-            sheet_name=f"{self._key_1.capitalize()}s",
-            index=False,
-        )
-        # Must call close otherwise any append operation will fail.
-        xl_writer.close()
+        # Write the column names followed by the rows of the DataFrame.
+        # NaNs are replaced by None so that they result in empty cells.
+        ws.append(list(df.columns))
+        df = df.astype(object).where(df.notna(), None)
+        for row in df.itertuples(index=False, name=None):
+            ws.append(row)
+
+        wb.save(xl_fpath)
 
     def _match_exact(self, strings, m_dict):
         """
@@ -554,13 +572,30 @@ class Mapper(WadiBaseClass):
 
         Returns
         -------
-        result : list
-            A nested list which for each element in 'strings'
-            contains a two-item list, the first element being
-            the key that was matched, the second element being
-            the corresponding value from m_dict.
-        """
-        return [[s, m_dict[s]] if s in m_dict else [None, None] for s in strings]
+        found : ndarray
+            Array with for each element in 'strings' the key that was
+            matched, or None if no match was found.
+        alias : ndarray
+            Array with for each element in 'strings' the corresponding
+            value from m_dict, or None if no match was found.
+        """
+        # For large dictionaries, look up the positions of all strings
+        # in a single call to the (hash table based) get_indexer method
+        # of a pandas Index. Positions of strings that are not a key
+        # in m_dict are set to -1.
+        if len(m_dict) > EXACT_MATCH_INDEX_MIN_SIZE:
+            strings = np.array(list(strings), dtype=object)
+            pos = pd.Index(list(m_dict.keys())).get_indexer(strings)
+            matched = pos > -1
+            values = np.array(list(m_dict.values()), dtype=object)
+            found = np.where(matched, strings, None)
+            alias = np.full(len(strings), None, dtype=object)
+            alias[matched] = values[pos[matched]]
+            return found, alias
+
+        found = np.array([s if s in m_dict else None for s in strings], dtype=object)
+        alias = np.array([m_dict.get(s) for s in strings], dtype=object)
+        return found, alias
 
     def _match_regex(self, strings):
         """
@@ -575,25 +610,29 @@ class Mapper(WadiBaseClass):
 
         Returns
         -------
-        result : list
-            A nested list which for each element in 'strings'
-            contains a two-item list, the first element being
-            the string produced by the RegexMapper, the second
-            element being None.
-        """
-        regex_match = re.compile(self._regex_map.RE)
-        matches = [regex_match.match(s) for s in strings]
-        return [
-            [self._regex_map.str(m.groupdict()), None] if m else [None, None]
-            for m in matches
-        ]
+        found : ndarray
+            Array with for each element in 'strings' the string
+            produced by the RegexMapper, or None if no match was
+            found.
+        alias : ndarray
+            Array with None for each element in 'strings' (units
+            do not have an alias).
+        """
+        # Let the RegexMapper parse the strings. Strings that do not
+        # match its regular expression yield None. The same unit strings
+        # typically occur many times, so each distinct string is parsed
+        # only once.
+        parsed = {s: self._regex_map.parse(s) for s in dict.fromkeys(strings)}
+        found = np.array([parsed[s] for s in strings], dtype=object)
+        return found, np.full(len(found), None, dtype=object)
 
     def _match_fuzzy(self, strings, m_dict):
         """
         This method returns the values of the keys in m_dict for the
         elements in 'strings' that have a fuzzy score above a certain
-        threshold. The score is calculated by fuzzywuzzy's extractOne
-        method.
+        threshold. The scores are calculated by RapidFuzz's cdist
+        function, which scores all strings against all keys in a
+        single call.
 
         Parameters
         ----------
@@ -604,30 +643,68 @@ class Mapper(WadiBaseClass):
 
         Returns
         -------
-        result : list
-            A nested list which for each element in 'strings'
-            contains a two-item list, the first element being
-            the key that was matched (alongside with the score),
-            the second element being the corresponding value from
-            m_dict.
-        """
-        # Create a lambda function to call the extractOne function
-        # for an element in 'strings'.
-        fuzzy_score = lambda s: fwp.extractOne(
-            s,
-            list(m_dict.keys()),
-            scorer=fwf.token_sort_ratio,
-            score_cutoff=fuzzy_min_score(s),
-        )
-        # Also create a lambda function that formats the name
+        found : ndarray
+            Array with for each element in 'strings' the key that was
+            matched (alongside with the score), or None if no match was
+            found.
+        alias : ndarray
+            Array with for each element in 'strings' the corresponding
+            value from m_dict, or None if no match was found.
+        """
+        keys = list(m_dict.keys())
+        strings = list(strings)
+        # The token_sort_ratio scorer sorts the tokens of both strings
+        # before computing the ratio. Sort the tokens of the keys only
+        # once, so that the plain ratio scorer can be used (without any
+        # processor) for all strings.
+        sort_tokens = lambda s: " ".join(sorted(str(s).split()))
+        keys_n = [sort_tokens(k) for k in keys]
+
+        # A string that is a key in m_dict is an exact match, so there
+        # is no need to compute its scores for all keys. These strings
+        # get a score of 100.
+        scores = [(s, 100) if (s and s in m_dict) else None for s in strings]
+        todo = [i for i, t in enumerate(scores) if t is None]
+
+        if todo and keys:
+            # The minimum scores apply to scores rounded to integers
+            # (as reported in the summary), while RapidFuzz returns
+            # float scores, hence the 0.5 margin.
+            cutoffs = np.array([fuzzy_min_score(strings[i]) for i in todo]) - 0.5
+            # Compute the scores for the remaining strings in chunks
+            # of FUZZY_CDIST_CHUNK_SIZE strings to limit the size of
+            # the score matrix. Scores below the lowest cutoff are set
+            # to zero by cdist.
+            for i0 in range(0, len(todo), FUZZY_CDIST_CHUNK_SIZE):
+                rows = todo[i0 : i0 + FUZZY_CDIST_CHUNK_SIZE]
+                row_cutoffs = cutoffs[i0 : i0 + FUZZY_CDIST_CHUNK_SIZE]
+                matrix = fwp.cdist(
+                    [sort_tokens(strings[i]) for i in rows],
+                    keys_n,
+                    scorer=fwf.ratio,
+                    processor=None,
+                    score_cutoff=row_cutoffs.min(),
+                    dtype=np.float64,
+                    workers=-1,
+                )
+                # Select the key with the highest score for each string
+                # (argmax returns the first key in case of ties, just
+                # like extractOne) and check if the score exceeds the
+                # minimum score for that string.
+                best = matrix.argmax(axis=1)
+                best_scores = matrix[np.arange(len(rows)), best]
+                for i, j, score, cutoff in zip(rows, best, best_scores, row_cutoffs):
+                    if score >= cutoff:
+                        scores[i] = (keys[j], score)
+
+        # Create a lambda function that formats the name
         # of the matched string and the fuzzy score.
-        tuple2str = lambda t: f"{t[0]} (score: {t[1]}%)"
-        # Call the fuzzy_score lambda function for each element in
-        # 'strings'.
-        scores = [fuzzy_score(s) for s in strings]
-        # Return the nested list with the matched keys (including
-        # the score) and their corresponding values.
-        return [[tuple2str(s), m_dict.get(s[0])] if s else [None, None] for s in scores]
+        tuple2str = lambda t: f"{t[0]} (score: {round(t[1])}%)"
+        # Return the matched keys (including the score) and their
+        # corresponding values.
+        found = np.array([tuple2str(t) if t else None for t in scores], dtype=object)
+        alias = np.array([m_dict.get(t[0]) if t else None for t in scores], dtype=object)
+        return found, alias
 
     def _match_pubchem(self, strings):
         """
@@ -642,16 +719,22 @@ class Mapper(WadiBaseClass):
 
         Returns
         -------
-        result : list
-            A nested list which for each element in 'strings'
-            contains a two-item list, the first element being
-            the first compound returned by the PubChem autocomplete
-            API, the second element being the corresponding synonym.
-        """
-        # Call the query_pubchem_fuzzy function for each element in
-        # 'strings'. Note that the function returns a list with two
-        # elements.
-        return [query_pubchem_fuzzy(s) for s in strings]
+        found : ndarray
+            Array with for each element in 'strings' the first
+            compound returned by the PubChem autocomplete API, or
+            None if no compound was found.
+        alias : ndarray
+            Array with for each element in 'strings' the synonym
+            of the compound, or None if no compound was found.
+        """
+        # Call the query_pubchem_fuzzy function for each (unique)
+        # element in 'strings'. Note that the function returns a list
+        # with two elements.
+        res = query_pubchem_batch(query_pubchem_fuzzy, strings)
+        res = [res[s] for s in strings]
+        found = np.array([r[0] for r in res], dtype=object)
+        alias = np.array([r[1] for r in res], dtype=object)
+        return found, alias
 
     def _execute(
         self,
@@ -696,17 +779,15 @@ class Mapper(WadiBaseClass):
         # Create a DataFrame that will contain a summary of the results.
         df = pd.DataFrame({"header": columns, "name": strings})
 
-        # Use the StringList method replace_string to replace and remove
-        # strings as specified by the user.
-        strings.replace_strings(self._replace_strings)
-        strings.replace_strings({k: "" for k in self._remove_strings})
-        # Remove any leading or trailing whitespace
-        strings.strip()
+        # Use the StringList method normalize to replace and remove
+        # strings as specified by the user, and to remove any leading
+        # or trailing whitespace.
+        strings.normalize(self._replace_strings, self._remove_strings)
         # Store the modified strings in df
         df["modified"] = strings
 
         # Check if 'ascii' or 'fuzzy' were passed
-        if any([m in ["ascii", "fuzzy"] for m in self.match_method]):
+        if any(m in ("ascii", "fuzzy") for m in self.match_method):
             # Create a new StringList object and call the tidy_strings,
             # (converts all characters to lowercase and removes all
             # non-ASCII characters, as well as characters that are
@@ -718,14 +799,17 @@ class Mapper(WadiBaseClass):
 
             # Define a new mapping dictionary for which the keys are
             # tidied versions of the keys of the mapping dictionary
-            # specified by the user. Repeats the same methods that
-            # were used to create strings_t, but now for the keys of
-            # m_dict.
-            keys_t = StringList(self._m_dict.keys())
-            keys_t.replace_strings(self._replace_strings)
-            keys_t.replace_strings({k: "" for k in self._remove_strings})
-            keys_t.strip()
-            keys_t.tidy_strings()
+            # specified by the user. The keys are modified in the same
+            # way as the input strings, but in a single pass.
+            # The tidied keys are stored alongside the original keys
+            # and are only recomputed if the keys have changed since
+            # the previous call.
+            keys = tuple(self._m_dict.keys())
+            if self._keys_t is None or self._keys_t[0] != keys:
+                keys_t = StringList(keys)
+                keys_t.normalize(self._replace_strings, self._remove_strings, tidy=True)
+                self._keys_t = (keys, keys_t)
+            keys_t = self._keys_t[1]
             m_dict_t = {
                 k1: self._m_dict.get(k0) for k0, k1 in zip(self._m_dict, keys_t)
             }
@@ -741,7 +825,7 @@ class Mapper(WadiBaseClass):
         for m in self.match_method:
             # Select only the rows for which no match was found yet
             idx = df["found"].isnull()
-            if all(idx == False):
+            if not idx.any():
                 break
             dfsub = df.loc[idx, df.columns].copy()
             # The terms to be matched depends on the method
@@ -766,7 +850,7 @@ class Mapper(WadiBaseClass):
             # Store the matched strings in the 'found' column and
             # their aliases in the 'alias' columns. Note that the
             # regex match method does not set the unit aliases.
-            dfsub[["found", "alias"]] = res
+            dfsub["found"], dfsub["alias"] = res
             # Only place method in the 'method' column if a match
             # was found.
             idx = ~dfsub["found"].isnull()
@@ -800,15 +884,18 @@ class Mapper(WadiBaseClass):
             # Transfer the aliases found to the DataObject's
             # InfoTable by iterating over the 'alias' column. The
             # values in the 'header' column match up with the level-0
-            # keys of the InfoTable.
-            for index, (key_0, alias) in df[["header", "alias"]].dropna().iterrows():
+            # keys of the InfoTable. The underlying arrays are zipped
+            # to avoid the overhead of creating a Series for each row.
+            dfr = df[["header", "alias"]].dropna()
+            for key_0, alias in zip(dfr["header"].to_numpy(), dfr["alias"].to_numpy()):
                 rv_dict[key_0] = {"alias_n": alias}
         elif self._key_1 == "unit":
             # Transfer the unit strings found to the DataObject's
             # InfoTable by iterating over the 'found' column. The
             # values in the 'header' column match up with the level-0
             # keys of the InfoTable.
-            for index, (key_0, u_str) in df[["header", "found"]].dropna().iterrows():
+            dfr = df[["header", "found"]].dropna()
+            for key_0, u_str in zip(dfr["header"].to_numpy(), dfr["found"].to_numpy()):
                 rv_dict[key_0] = {"u_str": u_str}
 
         return rv_dict
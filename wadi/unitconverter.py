@@ -1,4 +1,6 @@
+import functools
 import molmass as mm
+import re
 from molmass.molmass import FormulaError
 from pint import UnitRegistry
 from pint.errors import DimensionalityError, UndefinedUnitError, OffsetUnitCalculusError
@@ -57,36 +59,17 @@ def dict2str(groupdict):
 
     # Check if at least a numerator and/or one of the denominators
     # is contained in the dictionary with matched terms. 
-    if not all(x is None for x in [n, d0, d1]):
-        # Create an empty formatted string
-        rv = f""
-        # Add the numerator to rv if a match was found for it, else add '1'.
-        if len(n):
-            rv += f"{n}"
-        else:
-            rv += f"1"
-        # Add a '/(' and the first denominator to rv if a match was found for
-        # it, else add '/ (1'.
-        if len(d0):
-            rv += f" / ({d0}"
-        else:
-            rv += f" / (1"
-        # Add the second denominator and a closing parenthesis to rv 
-        # if a match was found for it, else add just a closing parenthesis.
-        if len(d1):
-            rv += f"{d1})"
-        else:
-            rv += f")"
-        # Add the formula that was found for the molar mass (if any was matched). 
-        # It is separated from the unit string by a vertical bar, which is what
-        # the _str2pint method in the UnitConverter class expects.  
-        if len(w0):
-            rv += f"|{w0}"
-        elif len(w1):
-            rv += f"|{w1}"
-    elif txt is not None: # Return any text string if one was matched.
-        if len(txt) > 0:
-            rv = txt
+    if (n is not None) or (d0 is not None) or (d1 is not None):
+        # Create the formatted string in a single expression. Any
+        # element of the numerator or the first denominator that was
+        # not matched is replaced by '1'. The formula that was found
+        # for the molar mass (if any was matched) is separated from the
+        # unit string by a vertical bar, which is what the _str2pint
+        # method in the UnitConverter class expects.
+        w = w0 or w1
+        rv = f"{n or '1'} / ({d0 or '1'}{d1 or ''})" + (f"|{w}" if w else "")
+    elif txt: # Return any text string if one was matched.
+        rv = txt
 
     return rv
 
@@ -107,18 +90,29 @@ class UnitRegexMapper:
         """
         # Check if any dictionaries were passed as arguments, else use the 
         # default dictionaries defined above.
-        if args:
-            self.RE = self._dict2RE(*args)
-        else:
-            self.RE = self._dict2RE(
-                DEFAULT_RE_DICT0,
-                DEFAULT_RE_DICT1,
-            )
+        if not args:
+            args = (DEFAULT_RE_DICT0, DEFAULT_RE_DICT1)
+        # Compile the regular expression once. It has no anchors and
+        # no leading or trailing whitespace, so that it can be used with
+        # the fullmatch method on stripped strings (see match).
+        self._pattern = re.compile(self._dict2RE(*args))
         # Set the function to be used for translating the groupdicts returned
         # by the match method to a string for the _str2pint method in the 
         # UnitConverter class.
         self.func = func
 
+    @property
+    def RE(self):
+        """
+        The regular expression used to match the unit strings, as a
+        string with anchors and optional leading and trailing
+        whitespace (the strings are matched with the equivalent
+        compiled expression without these, see match). This property
+        is read-only, pass the dictionaries to create the regular
+        expression from when initializing the class instead.
+        """
+        return rf"^\s*{self._pattern.pattern}\s*$"
+
     @staticmethod
     def _dict2RE(*args):
         """
@@ -126,19 +120,58 @@ class UnitRegexMapper:
         (chemical concentration) units. For more details on group names see 
         https://docs.python.org/3/library/re.html
         """
-        rv = r""
-        for i, re_dict in enumerate(args):
+        branches = []
+        for re_dict in args:
             if not isinstance(re_dict, dict):
                 raise TypeError(f"argument {re_dict} must be of type dict")
-            if i == 0:
-                rv += r"^\s*"
-            else:
-                rv += r"|^\s*"
-            for key, value in re_dict.items():
-                rv += rf"(?P<{key}>{value[0]}){value[1]}"
-            rv += r"\s*$"
+            branches.append(
+                "".join(rf"(?P<{key}>{value[0]}){value[1]}" for key, value in re_dict.items())
+            )
+        # Each dictionary produces one alternative of the regular
+        # expression, the alternatives are placed in a (non-capturing)
+        # group.
+        return rf"(?:{'|'.join(branches)})"
 
-        return rv
+    def match(self, s):
+        """
+        This method matches a unit string with the regular expression.
+        Instead of using anchors and matching any leading and trailing
+        whitespace with the regular expression, the whitespace is
+        stripped from the string and the entire remaining string must
+        match.
+
+        Parameters
+        ----------
+        s : str
+            The unit string to be matched.
+
+        Returns
+        -------
+        result : re.Match or None
+            The match object, or None if 's' does not match.
+        """
+        return self._pattern.fullmatch(s.strip())
+
+    def parse(self, s):
+        """
+        This method matches a unit string with the regular expression
+        and translates the groupdict of the match to a string that can
+        be used by the _str2pint method in the UnitConverter class.
+
+        Parameters
+        ----------
+        s : str
+            The unit string to be parsed.
+
+        Returns
+        -------
+        result : str or None
+            The string created by the function that translates the
+            groupdicts, or None if 's' did not match the regular
+            expression.
+        """
+        m = self.match(s)
+        return self.func(m.groupdict()) if m else None
 
     def str(self, groupdict):
         """
@@ -149,6 +182,26 @@ class UnitRegexMapper:
         return self.func(groupdict)
 
 
+@functools.lru_cache(maxsize=None)
+def _get_ureg():
+    """
+    Function that returns the Pint UnitRegistry shared by all
+    UnitConverter objects. Creating a UnitRegistry requires parsing
+    Pint's default definitions file, which is slow, so the registry
+    is created only once (on the first call). Note that the registry
+    is only read from after its creation, which is safe when it is
+    used from different threads.
+
+    Returns
+    -------
+    result : Pint UnitRegistry object
+        The UnitRegistry with the default format set to short ("~").
+    """
+    ureg = UnitRegistry()
+    ureg.default_format = "~"
+    return ureg
+
+
 class UnitConverter:
     """
     Class with some methods for unit parsing and conversion with Pint.
@@ -160,8 +213,18 @@ class UnitConverter:
 
         super().__init__()
 
-        self._ureg = UnitRegistry()
-        self._ureg.default_format = "~"
+        # Use the UnitRegistry that is shared by all instances.
+        self._ureg = _get_ureg()
+
+        # Dictionaries to store the molar masses and target units that
+        # were determined before. The same substances and units occur
+        # for many features, so they need to be looked up (or parsed)
+        # only once.
+        self._mw_cache = {}
+        self._qt_cache = {}
+        # Dictionary to store the return values of _str2pint for each
+        # combination of feature name and unit string.
+        self._str2pint_cache = {}
 
     def _get_mw(
         self,
@@ -181,7 +244,17 @@ class UnitConverter:
         result : Pint Quantity object
             The molar mass in g/mole, or None if  a FormulaError
             was raised from within the molmass library.
+
+        Notes
+        ----------
+        The results are stored in a dictionary, so the molar mass of
+        each substance is determined only once. This includes the
+        substances for which the molar mass could not be determined,
+        to avoid repeated requests to PubChem.
         """
+        if s in self._mw_cache:
+            return self._mw_cache[s]
+
         rv = None
         try:
             rv = mm.Formula(s).mass * self._ureg("g/mol")
@@ -190,7 +263,8 @@ class UnitConverter:
             rv = get_pubchem_molecular_weight(s) 
             if rv is not None:
                 rv = rv * self._ureg("g/mol")
-            
+
+        self._mw_cache[s] = rv
         return rv
 
     def get_uc(
@@ -222,7 +296,10 @@ class UnitConverter:
         """
         try:
             # Convert the target_units string to a Pint Quantity object
-            qt = self._ureg(target_units)
+            # (or use the Quantity object that was created before).
+            if target_units not in self._qt_cache:
+                self._qt_cache[target_units] = self._ureg(target_units)
+            qt = self._qt_cache[target_units]
 
             # Determine the molecular mass in g/mol.
             mw = None
@@ -230,10 +307,10 @@ class UnitConverter:
             # are molar units, which can be identified using the Pint
             # Quantity's object dimensionality property. If this is the case
             # a key called '[substance]' will be present.
+            # Note that _get_mw already falls back to PubChem if the molar
+            # mass can not be determined with the molmass library.
             if ('[substance]' in qt.dimensionality.keys()) and (mw_formula is not None):
                 mw = self._get_mw(mw_formula)
-                if mw is None:
-                    mw = get_pubchem_molecular_weight(mw_formula)
 
             # Use the source units 'to' method to determine the unit
             # conversion factor.
@@ -293,6 +370,37 @@ class UnitConverter:
         Both the units and the molecular mass are converted to a
         Pint Quantity object (i.e., the product of a unit and
         a magnitude).
+        The return values are stored, so that each combination
+        of 'name' and 'u_str' is parsed by Pint only once.
+        """
+        key = (name, u_str)
+        if key not in self._str2pint_cache:
+            self._str2pint_cache[key] = self._parse_u_str(name, u_str)
+        return self._str2pint_cache[key]
+
+    def _parse_u_str(
+        self,
+        name,
+        u_str,
+    ):
+        """
+        This method performs the actual parsing for _str2pint.
+
+        Parameters
+        ----------
+        name : str
+            The feature name alias.
+        u_str : str
+            String representation of the units to be parsed.
+
+        Returns
+        ----------
+        uq : Pint Quantity object
+            The units represented as Pint Quantity object.
+        mw_formula : str
+            The chemical formula of the substance.
+        msg : str
+            A message intended for the log file.
         """
         try:
             # Use the partition to split the string at the | symbol.
@@ -1,4 +1,4 @@
-from collections import UserList
+import functools
 import inspect
 import re
 
@@ -6,6 +6,32 @@ import numpy as np
 
 # DEFAULT_FUZZY_MINSCORES = {1: 100, 3: 100, 4: 90, 5: 85, 6: 80, 8: 75}
 DEFAULT_FUZZY_MINSCORES = {1: 100, 3: 100, 4: 90, 5: 85, 6: 80}
+# Lookup table with the minimum fuzzy scores for strings with a length
+# of 0 up to 255 characters, see fuzzy_min_score. The interp function
+# from NumPy yields fp[0] for x < xp[0] and fp[-1] for x > xp[-1]. The
+# table is stored as a tuple of Python floats, indexing a tuple is
+# faster than indexing a NumPy array for a single value.
+_FUZZY_MINSCORE_LUT = tuple(
+    np.interp(
+        np.arange(256),
+        list(DEFAULT_FUZZY_MINSCORES.keys()),
+        list(DEFAULT_FUZZY_MINSCORES.values()),
+    ).tolist()
+)
+
+# Precompiled regular expressions used by the string manipulation
+# functions below.
+# Matches any parentheses, brackets or accolades.
+_BRACKETS_RE = re.compile(r"[\(\)\[\]\{\}]")
+# Matches an opening parenthesis, any characters except parentheses
+# and the closing parenthesis (i.e. an innermost pair of parentheses
+# and the text between them).
+_PAREN_RE = re.compile(r"\([^()]*\)")
+# Matches any character that is not a number, an ASCII letter or
+# whitespace in the ASCII range (the characters that \s matches in
+# that range are listed explicitly), so all non-ASCII characters are
+# matched as well.
+_NONALNUM_RE = re.compile(r"[^0-9A-Za-z\t\n\x0b\x0c\r\x1c-\x1f ]")
 
 
 def check_arg(arg, valid_args):
@@ -28,20 +54,53 @@ def check_arg(arg, valid_args):
 
     Raises
     ------
-    IndexError
+    ValueError
         When no match was found.
 
     Notes
     ------
-    Uses a regular expression that checks if the argument appears
-    at the start of a string (case-insensitive).
+    Checks if the argument appears at the start of a string
+    (case-insensitive). The search stops at the first match.
+    """
+
+    valid_args = list(valid_args)
+    return _check_arg(arg, valid_args, [s.lower() for s in valid_args])
+
+
+def _check_arg(arg, valid_args, valid_args_l):
     """
+    Function that performs the actual check for check_arg and
+    check_arg_list.
+
+    Parameters
+    ----------
+    arg : str
+        The string to be checked.
+    valid_args : list
+        List with valid arguments.
+    valid_args_l : list
+        List with the lowercase versions of the elements in
+        valid_args.
+
+    Returns
+    -------
+    result : str
+        The first element in valid_args that produced a match for arg.
 
-    try:
-        find = re.compile(rf"^{arg}", re.IGNORECASE)
-        return [s for s in valid_args if find.match(s)][0]
-    except (ValueError, IndexError) as e:
-        raise ValueError(f"invalid argument: '{arg}' must be in {valid_args}")
+    Raises
+    ------
+    ValueError
+        When no match was found.
+    """
+    if isinstance(arg, str):
+        arg_l = arg.lower()
+        rv = next(
+            (s for s, s_l in zip(valid_args, valid_args_l) if s_l.startswith(arg_l)),
+            None,
+        )
+        if rv is not None:
+            return rv
+    raise ValueError(f"invalid argument: '{arg}' must be in {valid_args}")
 
 
 def check_arg_list(arg_list, valid_args):
@@ -65,14 +124,19 @@ def check_arg_list(arg_list, valid_args):
 
     Raises
     ------
-    IndexError
+    ValueError
         When no match was found for any of the elements in arg_list.
     """
 
     if isinstance(arg_list, str):
         arg_list = [arg_list]
 
-    return [check_arg(a, valid_args) for a in arg_list]
+    # Convert the valid arguments to lowercase only once for all
+    # elements in arg_list.
+    valid_args = list(valid_args)
+    valid_args_l = [s.lower() for s in valid_args]
+
+    return [_check_arg(a, valid_args, valid_args_l) for a in arg_list]
 
 
 def check_if_nested_list(n_list, min_elements=2):
@@ -95,16 +159,18 @@ def check_if_nested_list(n_list, min_elements=2):
     ValueError
         When a list within n_list contains less than min_elements elements.
     """
-    error_msg = f"Each nested element must be a list with >={min_elements} elements."
-    if isinstance(n_list, list):
-        for l in n_list:
-            if isinstance(l, list):
-                if len(l) < min_elements:
-                    raise ValueError(error_msg)
-            else:
-                raise TypeError(error_msg)
-    else:
+    if not isinstance(n_list, list):
         raise TypeError("Expected a nested list")
+    # Check all elements at once, the elements are only checked
+    # individually to determine the type of error if the check fails.
+    if not all(isinstance(l, list) and len(l) >= min_elements for l in n_list):
+        error_msg = f"Each nested element must be a list with >={min_elements} elements."
+        # Find the first invalid element, raise a TypeError if it is
+        # not a list and a ValueError if it has too few elements.
+        l = next(l for l in n_list if not (isinstance(l, list) and len(l) >= min_elements))
+        if isinstance(l, list):
+            raise ValueError(error_msg)
+        raise TypeError(error_msg)
 
 def parse_name_and_units(s):
     """
@@ -148,14 +214,109 @@ def parse_name_and_units(s):
         # Use a regular expression to strip off any
         # parentheses, brackets or accolades from the
         # string with the units.
-        return split_str[0], re.sub("[\(\)\[\]\{\}]", "", split_str[1])
+        return split_str[0], _BRACKETS_RE.sub("", split_str[1])
     
     # For empty strings the list returned by the split
     # function will be empty. Return empty strings for
     # both name and units in that case.
     return "", ""
 
-class StringList(UserList):
+
+def _replace_sequential(strings, items):
+    """
+    This function performs a search and replace on each element of
+    a list of strings. The replacements are performed one after the
+    other, in the order of 'items', so a replacement also applies to
+    the text inserted by the replacements before it. Each replacement
+    is a single str.replace call for all strings, which is faster than
+    combining the replacements into a translation table or a regular
+    expression for the (short) strings WaDI works with.
+
+    Parameters
+    ----------
+    strings : list
+        List with the strings to be modified.
+    items : iterable
+        Iterable with (search, replace) pairs of strings, for example
+        the items of a dictionary with the search strings as keys
+        and the replacement strings as values.
+
+    Returns
+    -------
+    result : list
+        List with the modified strings.
+
+    Raises
+    ------
+    TypeError
+        When any of the search or replace strings is not a str.
+    """
+    for k, v in items:
+        if not (isinstance(k, str) and isinstance(v, str)):
+            raise TypeError(f"Search and replace strings must be of type str, got {k!r}: {v!r}")
+        strings = [s.replace(k, v) for s in strings]
+    return strings
+
+
+def _strip_parentheses(s):
+    """
+    This function removes all characters between parentheses and the
+    parentheses themselves from a single string.
+
+    Parameters
+    ----------
+    s : str
+        The string to be modified.
+
+    Returns
+    -------
+    result : str
+        The modified string.
+    """
+    # The [^()]* in the regular expression indicates zero or more
+    # repetitions (as per the *) of any character except a parenthesis,
+    # so that the text between two pairs of parentheses is preserved.
+    # Only the innermost pairs are matched, so the substitution is
+    # repeated until no more pairs are found to remove nested
+    # parentheses as well.
+    n = 1
+    while n:
+        s, n = _PAREN_RE.subn("", s)
+    return s
+
+
+@functools.lru_cache(maxsize=65536)
+def _tidy(s):
+    """
+    This function tidies a single string by (i) turning all characters
+    to lowercase (ii) stripping all non-ASCII characters and (iii)
+    removing all characters that are not letters, numbers or whitespace.
+
+    Parameters
+    ----------
+    s : str
+        The string to be tidied.
+
+    Returns
+    -------
+    result : str
+        The tidied string.
+
+    Notes
+    -----
+    The results are cached, strings that occur more than once (for
+    example the same feature names in multiple files) are only tidied
+    once.
+    """
+    # Regular expression to filter out any character that is not
+    # a numeric lowercase or uppercase symbol (the caret inside the
+    # square brackets serves as the not operator). Non-ASCII characters
+    # are removed by the same regular expression, so the string does
+    # not need to be encoded and decoded.
+    return _NONALNUM_RE.sub("", s.lower())
+
+
+class StringList(list):
     """
     Class with convenience methods for lists of strings.
     """
@@ -169,7 +330,7 @@ class StringList(UserList):
             List of items to add to the StringList.
         """
         if initlist is not None: 
-            super().__init__([str(s) for s in initlist])
+            super().__init__(map(str, initlist))
 
     def replace_strings(self, r_dict):
         """
@@ -187,22 +348,66 @@ class StringList(UserList):
         Raises
         ------
         TypeError
-            When r_dict is not a dictionary.
+            When r_dict is not a dictionary or when any of its keys
+            or values is not a str.
+
+        Notes
+        -----
+        The replacements are performed one after the other, in the
+        order of the items in r_dict. A replacement therefore also
+        applies to the text inserted by the replacements before it,
+        for example {'a': 'b', 'b': 'c'} turns 'ab' into 'cc'.
         """
         if not isinstance(r_dict, dict):
             raise TypeError("Argument 'r_dict' must be of type dict")
-        try:
-            for key, value in r_dict.items():
-                self.data = [s.replace(key, value) for s in self.data]
-        except:
-            pass
+        self[:] = _replace_sequential(self, r_dict.items())
+
+    def normalize(self, r_dict, remove_strings, tidy=False):
+        """
+        This method modifies the elements of the StringList by
+        replacing the strings in r_dict, removing the strings in
+        remove_strings and stripping leading and trailing whitespace.
+        Optionally, the strings are also tidied. The result is the
+        same as calling replace_strings (twice), strip and
+        tidy_strings in succession, but the StringList is modified
+        only once.
+
+        Parameters
+        ----------
+        r_dict : dict
+            Dictionary of which the keys are the strings to search for
+            and the values are the strings to replace the search values
+            with.
+        remove_strings : list
+            List of strings that need to be deleted.
+        tidy : bool, optional
+            Indicates if the strings must be tidied as well (see
+            tidy_strings). Default: False.
+
+        Raises
+        ------
+        TypeError
+            When r_dict is not a dictionary or when any of the strings
+            in r_dict or remove_strings is not a str.
+        """
+        if not isinstance(r_dict, dict):
+            raise TypeError("Argument 'r_dict' must be of type dict")
+        # The removals are performed after the replacements (removing
+        # a string is the same as replacing it with an empty string).
+        strings = _replace_sequential(
+            self, [*r_dict.items(), *((k, "") for k in remove_strings)]
+        )
+        if tidy:
+            self[:] = [_tidy(s.strip()) for s in strings]
+        else:
+            self[:] = [s.strip() for s in strings]
 
     def strip(self):
         """
         This method removes all leading or trailing whitespace from
         the string items in the list.
         """
-        self.data = [s.strip() for s in self.data]
+        self[:] = [s.strip() for s in self]
 
     def strip_parentheses(self):
         """
@@ -210,10 +415,7 @@ class StringList(UserList):
         removing all characters between parentheses and the
         parentheses themselves.
         """
-        # The .* in the regular expression indicates zero or more
-        # repetitions (as per the *) of any character except a
-        # newline (as per the .)
-        self.data = [re.sub("\(.*\)", "", s) for s in self.data]
+        self[:] = [_strip_parentheses(s) for s in self]
 
     def tidy_strings(self):
         """
@@ -222,12 +424,7 @@ class StringList(UserList):
         non-ASCII characters and (iii) removing all characters that
         are not letters, numbers or whitespace.
         """
-        self.data = [s.lower() for s in self.data]
-        self.data = [s.encode("ascii", "ignore").decode("ascii") for s in self.data]
-        # Regular expression to filter out any character that is not
-        # a numeric lowercase or uppercase symbol (the caret inside the
-        # square brackets serves as the not operator).
-        self.data = [re.sub("[^0-9a-zA-Z\s]", "", s) for s in self.data]
+        self[:] = [_tidy(s) for s in self]
 
 
 def valid_kwargs(f, **kwargs):
@@ -247,21 +444,38 @@ def valid_kwargs(f, **kwargs):
     result : dict
         Dictionary with only the valid keyword arguments passed in kwargs.
     """
-    valid_kwargs = inspect.signature(f).parameters
-    rv = kwargs
-    for kw in rv.copy():
-        if kw not in valid_kwargs:
-            rv.pop(kw)
+    params = _signature_parameters(f)
+    return {kw: v for kw, v in kwargs.items() if kw in params}
 
-    return rv
+
+@functools.lru_cache(maxsize=128)
+def _signature_parameters(f):
+    """
+    This function returns the names of the parameters of callable 'f'.
+    The results are cached because inspect.signature is slow.
+
+    Parameters
+    ----------
+    f : callable function
+        Function for which the parameter names must be returned.
+
+    Returns
+    -------
+    result : frozenset
+        Set with the names of the parameters of 'f'.
+    """
+    return frozenset(inspect.signature(f).parameters)
 
 
 def fuzzy_min_score(s):
     """
     This function calculates the minimum score required for a valid
-    match in fuzzywuzzy's extractOne function. The minimum score depends
-    on the length of 's' and is calculated based on the string lengths and
-    scores in the DEFAULT_MINSCORES dictionary.
+    fuzzy match. The Mapper scores all strings against the keys of the
+    mapping dictionary with RapidFuzz's cdist function, and the best
+    score for each string (each row of the score matrix) must be at
+    least the minimum score for that string. The minimum score depends
+    on the length of 's' and is calculated based on the string lengths
+    and scores in the DEFAULT_FUZZY_MINSCORES dictionary.
 
     Parameters
     ----------
@@ -273,11 +487,9 @@ def fuzzy_min_score(s):
     result : float
         The minimum score for 's'.
     """
-    xp = list(DEFAULT_FUZZY_MINSCORES.keys())
-    fp = [v for v in DEFAULT_FUZZY_MINSCORES.values()]
-    # Use the interp function from NumPy. By default this function
-    # yields fp[0] for x < xp[0] and fp[-1] for x > xp[-1]
-    return np.interp(len(s), xp, fp)
+    # Look up the score in the precomputed table. Strings that are
+    # longer than the table get the score for the longest length.
+    return _FUZZY_MINSCORE_LUT[min(len(s), len(_FUZZY_MINSCORE_LUT) - 1)]
 
 
 def _wadi_style_warning(message):